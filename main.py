@@ -1,11 +1,19 @@
 # main.py  -- final production-ready worker
 import os
 import time
-import json
 import logging
+import atexit
+import collections
+import hashlib
+import io
+import html
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
-from threading import Thread
+from threading import Thread, BoundedSemaphore, Condition
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # optional libs
 try:
@@ -16,6 +24,11 @@ except Exception:
 from dotenv import load_dotenv
 import openai
 
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
 # google genai (Gemini)
 try:
     from google import genai
@@ -27,7 +40,7 @@ ENABLE_HEALTH = os.getenv("ENABLE_HEALTH", "0") in ("1", "true", "True")
 
 if ENABLE_HEALTH:
     try:
-        from flask import Flask, jsonify
+        from flask import Flask
     except Exception:
         Flask = None
         logging.warning("Flask not installed; health endpoint won't run unless flask is installed in requirements.")
@@ -44,9 +57,28 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "").strip()
 REDIS_URL = os.getenv("REDIS_URL", "").strip() or None
 POLL_SECONDS = int(os.getenv("POLL_SECONDS", "180"))
 MAX_FETCH_LIMIT = int(os.getenv("MAX_FETCH_LIMIT", "15"))
+WORKERS = int(os.getenv("WORKERS", "4"))
+MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "8"))
+TG_RATE = float(os.getenv("TG_RATE", "1.0"))   # Telegram posts per second (per-chat limit is ~1/s)
+TG_BURST = int(os.getenv("TG_BURST", "2"))
+# connections kept per host; sized so worker threads never wait on (or overflow) a pool checkout
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", str(max(MAX_INFLIGHT, WORKERS) * 2)))
 
 # CryptoPanic endpoint to prefer (v1 is simpler). If you have a different dev endpoint (v2), set CP_API_URL
 CP_API_URL = os.getenv("CP_API_URL", "https://cryptopanic.com/api/v1/posts/")
+# query is constant for the process lifetime; metadata=false keeps the (unused) extra fields out of the payload
+CP_PARAMS = {
+    "auth_token": CRYPTOPANIC_KEY,
+    "public": "true",
+    "filter": "news",
+    "metadata": "false",
+    "page": 1
+}
+
+# Telegram endpoints and post template are fixed for the process lifetime
+TG_SEND_PHOTO = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
+TG_SEND_MSG = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+READ_MORE_TMPL = "{summary}\n\n🔗 <a href=\"{url}\">Read more</a>"
 
 # Logging
 logging.basicConfig(
@@ -88,13 +120,45 @@ else:
     elif not GEMINI_API_KEY:
         log.warning("GEMINI_API_KEY not provided; gemini image generation is disabled.")
 
+# -------- Shared HTTP session (keep-alive across polls) --------
+SESSION = requests.Session()
+# requests already negotiates gzip/deflate (plus br/zstd when installed), so only the UA is set here
+SESSION.headers["User-Agent"] = "crypto-mcp-worker/1.0"
+# Transport-level retries with exponential backoff and Retry-After, reusing the pooled connection.
+# Only GETs are retried: re-sending a Telegram POST after a 5xx could double-post.
+HTTP_RETRY = Retry(
+    total=6,
+    backoff_factor=2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+    allowed_methods=("GET",),
+    raise_on_status=False,  # hand the final response back so raise_for_status() reports it
+)
+# One adapter shared by every host (CryptoPanic, Telegram); it keeps a separate pool per host.
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=HTTP_RETRY)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+if HTTP_POOL_MAXSIZE < WORKERS:
+    log.warning("HTTP_POOL_MAXSIZE=%d is below WORKERS=%d; urllib3 will discard connections and re-handshake.",
+                HTTP_POOL_MAXSIZE, WORKERS)
+
 # -------- Persistence (Redis or local file) --------
 SEEN_KEY = "cryptopanic_seen_ids"
+redis_client = None
 if REDIS_URL and redis:
     try:
         redis_client = redis.from_url(REDIS_URL)
-        def is_seen(_id): return redis_client.sismember(SEEN_KEY, _id)
-        def mark_seen(_id): return redis_client.sadd(SEEN_KEY, _id)
+        def seen_flags(ids):
+            # one round-trip for the whole batch instead of one SISMEMBER per item
+            try:
+                return [bool(f) for f in redis_client.smismember(SEEN_KEY, ids)]
+            except (AttributeError, redis.ResponseError):
+                # SMISMEMBER needs Redis >= 6.2 / redis-py >= 3.5; pipeline the old command instead
+                pipe = redis_client.pipeline(transaction=False)
+                for _id in ids:
+                    pipe.sismember(SEEN_KEY, _id)
+                return [bool(f) for f in pipe.execute()]
+        def mark_seen_many(ids): return redis_client.sadd(SEEN_KEY, *ids)
         log.info("Using Redis for persistence (REDIS_URL provided).")
     except Exception:
         redis_client = None
@@ -103,88 +167,226 @@ if REDIS_URL and redis:
 
 if not REDIS_URL:
     DATA_FILE = "/tmp/seen_ids.json"
+    SEEN_LOG_FILE = DATA_FILE + ".log"
+    SEEN_COMPACT_EVERY = int(os.getenv("SEEN_COMPACT_EVERY", "500"))
+    SEEN_CAP = int(os.getenv("SEEN_CAP", "50000"))
+    # LRU of recently seen ids (values unused); oldest entries fall off past SEEN_CAP
+    SEEN = collections.OrderedDict()
+
+    def _remember(_id):
+        SEEN[_id] = None
+        SEEN.move_to_end(_id)
+        while len(SEEN) > SEEN_CAP:
+            SEEN.popitem(last=False)
+
+    # legacy snapshot from older versions, if still around
+    try:
+        with open(DATA_FILE, "rb") as f:
+            for _id in orjson.loads(f.read()):
+                _remember(_id)
+    except Exception:
+        pass
+    # append-only log: one id per line
     try:
-        with open(DATA_FILE, "r") as f:
-            SEEN = set(json.load(f))
+        with open(SEEN_LOG_FILE, "r") as f:
+            for line in f:
+                if line.strip():
+                    _remember(line.strip())
     except Exception:
-        SEEN = set()
-    def is_seen(_id): return _id in SEEN
-    def mark_seen(_id):
-        SEEN.add(_id)
+        pass
+    SEEN_LOG = open(SEEN_LOG_FILE, "a", buffering=1)
+    _seen_appends = 0
+
+    def compact_seen_log():
+        """Rewrite the log as the capped SEEN set, oldest first (atomic via os.replace)."""
+        global SEEN_LOG, _seen_appends
+        tmp = SEEN_LOG_FILE + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.writelines(_id + "\n" for _id in SEEN)
+            SEEN_LOG.close()
+            os.replace(tmp, SEEN_LOG_FILE)
+            # the log now holds everything the legacy snapshot had; stop re-importing it on startup
+            try:
+                os.remove(DATA_FILE)
+            except FileNotFoundError:
+                pass
+        except Exception:
+            log.exception("Failed to compact seen ids log.")
+        finally:
+            if SEEN_LOG.closed:
+                SEEN_LOG = open(SEEN_LOG_FILE, "a", buffering=1)
+        _seen_appends = 0
+
+    def is_seen(_id):
+        if _id in SEEN:
+            SEEN.move_to_end(_id)
+            return True
+        return False
+    def seen_flags(ids): return [is_seen(_id) for _id in ids]
+    def mark_seen_many(ids):
+        global _seen_appends
         try:
-            with open(DATA_FILE, "w") as f:
-                json.dump(list(SEEN), f)
+            for _id in ids:
+                if _id not in SEEN:
+                    SEEN_LOG.write(_id + "\n")
+                    _seen_appends += 1
+                _remember(_id)
         except Exception:
-            log.exception("Failed to write seen ids to local file.")
+            log.exception("Failed to append seen ids to local log.")
+        if _seen_appends >= SEEN_COMPACT_EVERY:
+            compact_seen_log()
+
+    atexit.register(compact_seen_log)
+    log.info("Using local file for persistence at %s (ephemeral across restarts).", SEEN_LOG_FILE)
+
+# -------- Provider result cache (Redis only) --------
+CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))
+
+def cache_key(prefix, text):
+    return prefix + ":" + hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def cache_get(key):
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except Exception:
+        log.exception("Redis cache read failed for %s.", key)
+        return None
+
+def cache_set(key, value):
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(key, CACHE_TTL, value)
+    except Exception:
+        log.exception("Redis cache write failed for %s.", key)
 
-    log.info("Using local file for persistence at %s (ephemeral across restarts).", DATA_FILE)
+# -------- Rate limiting --------
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks only while the bucket is empty,
+    so low-volume cycles never sleep.
+    """
+    def __init__(self, rate=1.0, capacity=2):
+        # capacity < 1 would block acquire() forever; rate <= 0 would never refill
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"TokenBucket needs rate > 0 and capacity >= 1 (got rate={rate}, capacity={capacity})")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._cond = Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self._cond.wait((1 - self._tokens) / self.rate)
+
+if TG_RATE <= 0:
+    log.warning("TG_RATE=%s must be > 0; using 1.0.", TG_RATE)
+    TG_RATE = 1.0
+if TG_BURST < 1:
+    log.warning("TG_BURST=%s must be >= 1; using 1.", TG_BURST)
+    TG_BURST = 1
+TG_BUCKET = TokenBucket(rate=TG_RATE, capacity=TG_BURST)
 
 # -------- Helper functions --------
-def fetch_news_with_backoff(limit=10, max_attempts=6):
+def fetch_news_with_backoff(limit=10):
     """
-    Fetch CryptoPanic posts with exponential backoff and Retry-After handling.
-    Returns list of results or [] on repeated failures.
+    Fetch CryptoPanic posts. Backoff, Retry-After and 5xx retries are handled by the session's Retry policy.
+    Sends If-None-Match / If-Modified-Since from the last fully processed 200 so unchanged feeds come back as a bodyless 304.
+    Returns (results, validators): results is a list ([] on failure) or CP_NOT_MODIFIED on a 304;
+    validators is the (ETag, Last-Modified) pair of a 200, or None. The caller decides when to store them.
     """
     if not CRYPTOPANIC_KEY:
         log.error("CRYPTOPANIC_KEY missing; cannot fetch CryptoPanic.")
-        return []
-
-    params = {
-        "auth_token": CRYPTOPANIC_KEY,
-        "public": "true",
-        "filter": "news",
-        "page": 1
-    }
-    attempt = 0
-    backoff = 2  # seconds
-    while attempt < max_attempts:
-        try:
-            r = requests.get(CP_API_URL, params=params, timeout=20)
-            if r.status_code == 429:
-                retry_after = r.headers.get("Retry-After")
-                if retry_after:
-                    try:
-                        wait = int(retry_after)
-                    except Exception:
-                        wait = backoff
-                else:
-                    wait = backoff
-                log.warning("CryptoPanic 429 Too Many Requests — waiting %s seconds (attempt %d/%d).", wait, attempt+1, max_attempts)
-                time.sleep(wait)
-                attempt += 1
-                backoff = min(300, backoff * 2)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            results = data.get("results", []) if isinstance(data, dict) else data
-            if not results:
-                log.info("CryptoPanic returned empty results.")
-                return []
-            return results[:limit]
-        except requests.HTTPError as e:
-            status = getattr(e.response, "status_code", None)
-            log.exception("HTTPError fetching CryptoPanic (status=%s).", status)
-            if status == 429:
-                # handled above but fallback
-                time.sleep(backoff)
-                attempt += 1
-                backoff = min(300, backoff*2)
-                continue
-            if status and 500 <= status < 600:
-                # server error - retry
-                time.sleep(backoff)
-                attempt += 1
-                backoff = min(300, backoff*2)
-                continue
-            # other HTTP errors -> no retry
-            return []
-        except Exception:
-            log.exception("Unexpected error fetching CryptoPanic.")
-            time.sleep(backoff)
-            attempt += 1
-            backoff = min(300, backoff*2)
-    log.error("Exceeded fetch attempts for CryptoPanic; returning empty list.")
-    return []
+        return [], None
+
+    headers = {}
+    if fetch_news_with_backoff._cp_etag:
+        headers["If-None-Match"] = fetch_news_with_backoff._cp_etag
+    if fetch_news_with_backoff._cp_lastmod:
+        headers["If-Modified-Since"] = fetch_news_with_backoff._cp_lastmod
+    try:
+        r = SESSION.get(CP_API_URL, params=CP_PARAMS, headers=headers, timeout=20)
+        if r.status_code == 304:
+            return CP_NOT_MODIFIED, None
+        r.raise_for_status()
+        # orjson parses straight from the raw bytes, skipping requests' decode + stdlib json
+        data = orjson.loads(r.content)
+    except requests.HTTPError as e:
+        log.exception("HTTPError fetching CryptoPanic (status=%s).", getattr(e.response, "status_code", None))
+        return [], None
+    except Exception:
+        log.exception("Unexpected error fetching CryptoPanic.")
+        return [], None
+    validators = (r.headers.get("ETag"), r.headers.get("Last-Modified"))
+    results = data.get("results", []) if isinstance(data, dict) else data
+    if not results:
+        log.info("CryptoPanic returned empty results.")
+        return [], validators
+    return results[:limit], validators
+
+def save_cp_validators(validators):
+    fetch_news_with_backoff._cp_etag, fetch_news_with_backoff._cp_lastmod = validators
+
+# validators from the last fully processed 200 response, used for conditional GETs
+fetch_news_with_backoff._cp_etag = None
+fetch_news_with_backoff._cp_lastmod = None
+# returned on 304 so process_once can tell "unchanged" apart from "nothing fetched"
+CP_NOT_MODIFIED = object()
+
+def _read_first_json_object(resp):
+    """
+    Consume a streamed ChatCompletion until the first top-level JSON object closes,
+    then close the stream so we don't wait for (or pay for) trailing tokens.
+    Returns the object's text, or everything received if it never closed.
+    """
+    buf = ""
+    start = -1
+    depth = 0
+    in_str = False
+    escape = False
+    try:
+        for chunk in resp:
+            piece = chunk["choices"][0].get("delta", {}).get("content") or ""
+            pos = len(buf)
+            buf += piece
+            for i, ch in enumerate(piece, pos):
+                if in_str:
+                    if escape:
+                        escape = False
+                    elif ch == "\\":
+                        escape = True
+                    elif ch == '"':
+                        in_str = False
+                elif ch == '"':
+                    if start != -1:
+                        in_str = True
+                elif ch == "{":
+                    if start == -1:
+                        start = i
+                    depth += 1
+                elif ch == "}" and start != -1:
+                    depth -= 1
+                    if depth == 0:
+                        return buf[start:i+1]
+    finally:
+        close = getattr(resp, "close", None)
+        if close:
+            close()
+    return buf.strip()
 
 def ask_chatgpt_for_json(title, url, excerpt):
     """
@@ -195,39 +397,65 @@ def ask_chatgpt_for_json(title, url, excerpt):
         log.error("OPENAI_API_KEY missing — cannot summarize articles.")
         return {"summary": f"{title} — read more: {url}", "caption": title[:120], "image_prompt": {"scene": title}}
 
-    system = (
-        "You are a concise crypto news editor. Output ONLY valid JSON with three keys: "
-        "\"summary\" (2-3 sentence factual summary), \"caption\" (<=120 chars), and \"image_prompt\" "
-        "(an object with keys style, scene, elements, restrictions)."
-    )
-    user = f"Title: {title}\nURL: {url}\n\nExcerpt: {excerpt}\n\nReturn JSON exactly like: {{\"summary\":\"...\",\"caption\":\"...\",\"image_prompt\":{{\"style\":\"\",\"scene\":\"\",\"elements\":\"\",\"restrictions\":\"\"}}}}"
+    k = cache_key("sum", title + "|" + url)
+    cached = cache_get(k)
+    if cached:
+        try:
+            return orjson.loads(cached)
+        except Exception:
+            log.warning("Ignoring unparseable cached summary %s.", k)
+
+    system = "You are a concise crypto news editor; reply in JSON with keys summary, caption, image_prompt."
+    user = f"Title: {title}\nURL: {url}\n\nExcerpt: {excerpt}\n\nsummary: 2-3 factual sentences. caption: <=120 chars. image_prompt: object with style, scene, elements, restrictions."
 
     try:
+        # JSON mode: the server constrains output to a single JSON object, so no salvage parsing is needed.
+        # Streamed so we can stop as soon as that object closes (JSON mode may otherwise pad with whitespace).
         resp = openai.ChatCompletion.create(
             model="gpt-4.1-mini",
             messages=[{"role":"system","content":system},{"role":"user","content":user}],
             max_tokens=400,
             temperature=0.2,
+            response_format={"type": "json_object"},
+            stream=True,
         )
-        txt = resp["choices"][0]["message"]["content"].strip()
+        txt = _read_first_json_object(resp)
         try:
-            j = json.loads(txt)
-            return j
+            j = orjson.loads(txt)
         except Exception:
-            # Try to extract JSON substring if model returned text + JSON
-            start = txt.find("{")
-            end = txt.rfind("}")
-            if start != -1 and end != -1 and end > start:
-                try:
-                    j = json.loads(txt[start:end+1])
-                    return j
-                except Exception:
-                    log.exception("Failed to parse JSON from ChatGPT response.")
+            # only happens if the completion was cut off (e.g. hit max_tokens)
             log.warning("ChatGPT didn't return parseable JSON. Using fallback summary text.")
             return {"summary": txt[:800], "caption": title[:120], "image_prompt": {"scene": title}}
     except Exception:
         log.exception("ChatGPT call failed; returning fallback summary.")
         return {"summary": f"{title} — read more: {url}", "caption": title[:120], "image_prompt": {"scene": title}}
+    # only successful, well-typed completions are cached; anything else is retried next time
+    if isinstance(j, dict) and isinstance(j.get("summary"), str):
+        cache_set(k, orjson.dumps(j))
+    return j
+
+IMAGE_RECOMPRESS_OVER = 200 * 1024  # bytes
+IMAGE_MAX_SIDE = 1280
+
+def shrink_image(img_bytes):
+    """
+    Downscale and re-encode large images as JPEG before upload (Telegram recompresses anyway).
+    Returns the original bytes if Pillow is missing, the image is small, or decoding fails.
+    """
+    if Image is None or not img_bytes or len(img_bytes) <= IMAGE_RECOMPRESS_OVER:
+        return img_bytes
+    try:
+        im = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+        im.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=82, optimize=True, progressive=True)
+    except Exception:
+        log.exception("Failed to recompress image; uploading original.")
+        return img_bytes
+    log.debug("Recompressed image %d -> %d bytes.", len(img_bytes), buf.tell())
+    return buf.getvalue()
+
+PROMPT_TMPL = "style: {style} | scene: {scene} | elements: {elements} | restrictions: {restrictions}"
 
 def generate_image_via_gemini(prompt_obj):
     """
@@ -238,17 +466,22 @@ def generate_image_via_gemini(prompt_obj):
         return None
 
     if isinstance(prompt_obj, dict):
-        parts = []
-        for k, v in prompt_obj.items():
-            parts.append(f"{k}: {v}")
-        prompt_text = " | ".join(parts)
+        # fixed key order keeps the prompt (and its cache key) canonical; missing keys render empty
+        prompt_text = PROMPT_TMPL.format_map(collections.defaultdict(str, prompt_obj))
     else:
         prompt_text = str(prompt_obj)
 
+    # Model name may vary based on your access. If this errors, try "gemini-2.1" or "gemini-2.5-flash-image" etc.
+    model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    k_img = cache_key("img", model_name + "|" + prompt_text)
+    cached = cache_get(k_img)
+    if cached:
+        log.info("Using cached Gemini image for prompt (truncated): %s", prompt_text[:240])
+        return bytes(cached)
+
     log.info("Requesting Gemini image. Prompt (truncated): %s", prompt_text[:240])
+    img = None
     try:
-        # Model name may vary based on your access. If this errors, try "gemini-2.1" or "gemini-2.5-flash-image" etc.
-        model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
         response = gemini_client.models.generate_content(model=model_name, contents=[prompt_text])
         # The SDK returns candidates with parts; find inline_data
         try:
@@ -257,17 +490,23 @@ def generate_image_via_gemini(prompt_obj):
                 inline = getattr(part, "inline_data", None)
                 if inline:
                     # inline.data is a bytes-like; return raw bytes
-                    return bytes(inline.data)
+                    img = bytes(inline.data)
+                    break
                 # fallback: if part.text contains a data:uri
                 text = getattr(part, "text", None)
                 if text and text.strip().startswith("data:image"):
                     b64 = text.split(",", 1)[1]
-                    return base64.b64decode(b64)
+                    img = base64.b64decode(b64)
+                    break
         except Exception:
             log.exception("Unexpected Gemini response shape.")
     except Exception:
         log.exception("Gemini image generation failed.")
-    return None
+    if img:
+        # cache the upload-ready bytes so hits skip Pillow and Redis never holds raw multi-MB output
+        img = shrink_image(img)
+        cache_set(k_img, img)
+    return img
 
 def post_to_telegram(image_bytes, caption):
     """
@@ -278,16 +517,19 @@ def post_to_telegram(image_bytes, caption):
         log.error("Telegram bot token or chat id missing; cannot post.")
         return None
 
+    TG_BUCKET.acquire()
     try:
         if image_bytes:
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
-            files = {"photo": ("news.png", image_bytes)}
+            # explicit mime so requests doesn't have to guess; raw bytes avoid an extra copy via a file object
+            if image_bytes[:3] == b"\xff\xd8\xff":
+                files = {"photo": ("news.jpg", image_bytes, "image/jpeg")}
+            else:
+                files = {"photo": ("news.png", image_bytes, "image/png")}
             data = {"chat_id": TELEGRAM_CHAT_ID, "caption": caption, "parse_mode": "HTML"}
-            r = requests.post(url, data=data, files=files, timeout=30)
+            r = SESSION.post(TG_SEND_PHOTO, data=data, files=files, timeout=30)
         else:
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
             json_data = {"chat_id": TELEGRAM_CHAT_ID, "text": caption, "parse_mode": "HTML"}
-            r = requests.post(url, json=json_data, timeout=30)
+            r = SESSION.post(TG_SEND_MSG, json=json_data, timeout=30)
 
         r.raise_for_status()
         log.info("Posted to Telegram (status %s).", r.status_code)
@@ -316,55 +558,104 @@ def start_health_server():
     Thread(target=lambda: app.run(host="0.0.0.0", port=port), daemon=True).start()
 
 # -------- Main processing loop --------
+# Per-article work is I/O-bound (OpenAI, Gemini, Telegram), so overlap it across items.
+EXECUTOR = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="article")
+# Caps articles submitted but not yet finished, so a burst after downtime can't pile up provider calls.
+INFLIGHT = BoundedSemaphore(MAX_INFLIGHT)
+
+def _handle_item(item):
+    """
+    Summarize, illustrate and post a single news item.
+    Runs on a worker thread; returns (nid, ok). Seen-id bookkeeping stays on the caller.
+    Releases the INFLIGHT slot acquired by process_once when done.
+    """
+    try:
+        return _process_article(item)
+    finally:
+        INFLIGHT.release()
+
+def _process_article(item):
+    nid = str(item.get("id") or item.get("uuid") or item.get("url") or "")
+    title = item.get("title", "Untitled")
+    url = item.get("url", "")
+    excerpt = (item.get("body") or item.get("excerpt") or "")[:1000]
+
+    log.info("Processing article: %s", title)
+
+    # Summarize & get image prompt
+    j = ask_chatgpt_for_json(title, url, excerpt)
+    # JSON mode guarantees valid JSON, not string values; fall back to the title otherwise
+    summary = j.get("summary")
+    if not isinstance(summary, str):
+        summary = title
+    caption = j.get("caption")
+    caption = (caption if isinstance(caption, str) else title)[:120]
+    image_prompt = j.get("image_prompt", {"scene": title})
+
+    # Telegram message: summary + link
+    # escape both parts so "<", "&" or quotes in the model/fallback text can't break parse_mode=HTML
+    tg_caption = READ_MORE_TMPL.format(summary=html.escape(summary, quote=False), url=html.escape(url, quote=True))
+
+    # Generate image (best-effort)
+    img_bytes = None
+    try:
+        img_bytes = generate_image_via_gemini(image_prompt)
+    except Exception:
+        log.exception("Image generation crashed for article: %s", title)
+        img_bytes = None
+
+    # Post to Telegram
+    res = post_to_telegram(img_bytes, tg_caption)
+    if not res:
+        log.warning("Failed to post article %s to Telegram; will not mark as seen.", title)
+    return nid, bool(res)
+
 def process_once():
     # fetch news (with backoff)
-    news_items = fetch_news_with_backoff(limit=MAX_FETCH_LIMIT)
+    news_items, validators = fetch_news_with_backoff(limit=MAX_FETCH_LIMIT)
+    if news_items is CP_NOT_MODIFIED:
+        return 0
     if not news_items:
+        if validators:
+            save_cp_validators(validators)
         log.info("No news items fetched this cycle.")
         return 0
 
-    posted = 0
-    for item in news_items:
-        # get unique id - CryptoPanic 'id' field usually exists; fallback to url
-        nid = str(item.get("id") or item.get("uuid") or item.get("url") or "")
-        if not nid:
-            continue
-        if is_seen(nid):
+    # get unique id - CryptoPanic 'id' field usually exists; fallback to url
+    ids = [str(item.get("id") or item.get("uuid") or item.get("url") or "") for item in news_items]
+    keyed = [(item, nid) for item, nid in zip(news_items, ids) if nid]
+    flags = seen_flags([nid for _, nid in keyed]) if keyed else []
+    pending = []
+    for (item, nid), seen in zip(keyed, flags):
+        if seen:
             log.debug("Skipping already seen id %s", nid)
             continue
-
-        title = item.get("title", "Untitled")
-        url = item.get("url", "")
-        excerpt = (item.get("body") or item.get("excerpt") or "")[:1000]
-
-        log.info("Processing article: %s", title)
-
-        # Summarize & get image prompt
-        j = ask_chatgpt_for_json(title, url, excerpt)
-        summary = j.get("summary", title)
-        caption = j.get("caption", title)[:120]
-        image_prompt = j.get("image_prompt", {"scene": title})
-
-        # Telegram message: summary + link
-        tg_caption = f"{summary}\n\n🔗 <a href=\"{url}\">Read more</a>"
-
-        # Generate image (best-effort)
-        img_bytes = None
+        pending.append(item)
+
+    new_ids = []
+    futures = []
+    for item in pending:
+        if not INFLIGHT.acquire(timeout=POLL_SECONDS / 2):
+            # unsubmitted items are not marked seen, so the next poll picks them up
+            log.warning("backpressure — deferring item (%d not submitted this cycle).", len(pending) - len(futures))
+            break
+        futures.append(EXECUTOR.submit(_handle_item, item))
+    for fut in as_completed(futures):
         try:
-            img_bytes = generate_image_via_gemini(image_prompt)
+            nid, ok = fut.result()
         except Exception:
-            log.exception("Image generation crashed for article: %s", title)
-            img_bytes = None
-
-        # Post to Telegram
-        res = post_to_telegram(img_bytes, tg_caption)
-        if res:
-            mark_seen(nid)
-            posted += 1
-            # small delay to reduce burst
-            time.sleep(1.2)
-        else:
-            log.warning("Failed to post article %s to Telegram; will not mark as seen.", title)
+            log.exception("Unhandled exception while processing an article.")
+            continue
+        if ok:
+            new_ids.append(nid)
+    # marked here, in one batch, so SEEN / Redis are only touched from the main thread
+    if new_ids:
+        mark_seen_many(new_ids)
+    # Only trust this feed version once everything in it is handled; otherwise the next poll
+    # must re-download it (no 304) to retry deferred or failed items.
+    if len(new_ids) == len(pending):
+        save_cp_validators(validators)
+    posted = len(new_ids)
     log.info("Cycle complete — posted %d new items.", posted)
     return posted
 
@@ -372,12 +663,20 @@ def main_loop():
     if ENABLE_HEALTH:
         start_health_server()
     log.info("Starting main loop: poll every %s seconds", POLL_SECONDS)
+    # deadline-aligned: the period is POLL_SECONDS regardless of how long a cycle takes
+    next_run = time.monotonic()
     while True:
         try:
             process_once()
         except Exception:
             log.exception("Unhandled exception in main loop.")
-        time.sleep(POLL_SECONDS)
+        next_run += POLL_SECONDS
+        sleep_for = next_run - time.monotonic()
+        if sleep_for < 0:
+            log.warning("cycle overran by %.1fs", -sleep_for)
+            next_run = time.monotonic()
+        else:
+            time.sleep(sleep_for)
 
 if __name__ == "__main__":
     main_loop()